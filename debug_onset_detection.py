@@ -2,64 +2,133 @@
 """Debug onset detection issues"""
 
 import wave
-import struct
-import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal
+from scipy.ndimage import median_filter
+
+# Sample width in bytes -> (little-endian dtype, scale to [-1, 1]). The wave
+# module only opens integer PCM files, so 4-byte samples are int32, not float.
+SAMPLE_FORMATS = {
+    2: ('<i2', 1.0 / 2**15),  # 16-bit PCM
+    4: ('<i4', 1.0 / 2**31),  # 32-bit PCM
+}
 
 def read_wav(path):
-    """Read WAV file and return samples as list of floats"""
+    """Read WAV file and return samples as a float32 array, downmixed to mono"""
     with wave.open(path, 'r') as wav:
         sample_rate = wav.getframerate()
+        num_channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
         num_frames = wav.getnframes()
 
-        # Read all frames
-        frames = wav.readframes(num_frames)
-
-        # Convert to floats
-        if wav.getsampwidth() == 2:
-            # 16-bit PCM
-            samples = struct.unpack(f'<{num_frames}h', frames)
-            samples = [s / 32768.0 for s in samples]
-        elif wav.getsampwidth() == 4:
-            # 32-bit float
-            samples = struct.unpack(f'<{num_frames}f', frames)
-        else:
-            raise ValueError(f"Unsupported sample width: {wav.getsampwidth()}")
+        if sample_width not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample width: {sample_width} bytes")
 
-        return samples, sample_rate
-
-def calculate_energy_envelope(samples, sample_rate, window_ms=5.0):
-    """Calculate RMS energy envelope"""
-    window_samples = int((sample_rate * window_ms) / 1000.0)
+        # Read all frames in one call; decoding below is a zero-copy view
+        frames = wav.readframes(num_frames)
 
-    envelope = []
-    for i in range(0, len(samples), window_samples):
-        chunk = samples[i:i+window_samples]
-        if len(chunk) == 0:
-            break
-        rms = math.sqrt(sum(s*s for s in chunk) / len(chunk))
-        time = i / sample_rate
-        envelope.append((time, rms))
+    # A truncated file holds fewer frames than its header claims; only
+    # decode the complete frames actually present
+    num_frames = min(num_frames, len(frames) // (sample_width * num_channels))
 
-    return envelope
+    # Convert to floats
+    dtype, scale = SAMPLE_FORMATS[sample_width]
+    samples = np.frombuffer(frames, dtype=dtype, count=num_frames * num_channels)
+    samples = samples.astype(np.float32) * np.float32(scale)
 
-def detect_onsets(envelope, threshold_factor=0.15, min_distance_ms=60):
-    """Detect onsets using threshold and minimum distance"""
-    if not envelope:
-        return []
+    if num_channels > 1:
+        samples = samples.reshape(-1, num_channels).mean(axis=1, dtype=np.float32)
 
-    max_energy = max(e[1] for e in envelope)
-    threshold = max_energy * threshold_factor
+    return samples, sample_rate
 
-    onsets = []
-    last_onset_time = -1.0
-    min_distance_s = min_distance_ms / 1000.0
+def lowpass(samples, sample_rate, cutoff_hz=150.0, order=5):
+    """Band-limit samples with a Butterworth lowpass (isolates kick energy)"""
+    sos = signal.butter(order, cutoff_hz / (sample_rate / 2), btype='low', output='sos')
+    return signal.sosfilt(sos, samples)
 
-    for time, energy in envelope:
-        if energy > threshold and (time - last_onset_time) > min_distance_s:
-            onsets.append((time, energy))
-            last_onset_time = time
+def calculate_energy_envelope(samples, sample_rate, window_ms=5.0):
+    """Calculate RMS energy envelope, returned as (times, rms) arrays"""
+    window_samples = int((sample_rate * window_ms) / 1000.0)
 
-    return onsets
+    # View the buffer as (n_windows, window_samples) and reduce each row;
+    # a trailing partial window is dropped
+    n = len(samples) // window_samples
+    x = samples[:n * window_samples].reshape(n, window_samples)
+    rms = np.sqrt(np.einsum('ij,ij->i', x, x) / window_samples)
+    times = np.arange(n) * (window_samples / sample_rate)
+
+    return times, rms
+
+def detect_onsets(times, energies, mu=0.85):
+    """Detect onsets with valley-peak-distance (VPD) peak picking
+
+    Each local maximum of the envelope is paired with the local minimum
+    preceding it; an onset is reported at that valley when the rise
+    peak - valley is at least mu * (largest rise). mu is typically 0.75-1.
+
+    Returns (onset_times, rises) arrays.
+    """
+    if len(energies) < 3:
+        return np.empty(0), np.empty(0)
+
+    # Slope signs, with the last non-zero slope carried across flat runs
+    # so plateaus (e.g. digital silence) still register as turning points.
+    # A leading flat run has nothing to carry, so it counts as falling and
+    # its last frame becomes the valley before the first rise.
+    sgn = np.sign(np.diff(energies))
+    first_nonzero = np.flatnonzero(sgn)
+    sgn[:first_nonzero[0] if len(first_nonzero) else len(sgn)] = -1
+    last_nonzero = np.where(sgn != 0, np.arange(len(sgn)), 0)
+    np.maximum.accumulate(last_nonzero, out=last_nonzero)
+    sgn = sgn[last_nonzero]
+
+    peaks = np.flatnonzero((sgn[:-1] > 0) & (sgn[1:] < 0)) + 1
+    if len(peaks) == 0:
+        return np.empty(0), np.empty(0)
+
+    # Frame 0 stands in as the valley for a rise at the very start. If the
+    # envelope rises from frame 0 the file opens on a hit, so that rise is
+    # measured from the silence before the file.
+    valleys = np.flatnonzero((sgn[:-1] < 0) & (sgn[1:] > 0)) + 1
+    valleys = np.concatenate(([0], valleys))
+    prev_valleys = valleys[np.searchsorted(valleys, peaks, side='right') - 1]
+
+    valley_energies = energies[prev_valleys]
+    if sgn[0] > 0:
+        valley_energies = np.where(prev_valleys == 0, 0.0, valley_energies)
+    rises = energies[peaks] - valley_energies
+    selected = rises >= mu * rises.max()
+
+    return times[prev_valleys[selected]], rises[selected]
+
+def detect_onsets_adaptive(times, energies, delta_static=0.02, median_half_width=10,
+                           suppress_ms=25):
+    """Detect onsets against a median-filtered adaptive threshold
+
+    The threshold at frame n is delta_static + median(energies[n-M..n+M]),
+    so it follows loudness changes across the file. Above-threshold frames
+    are kept only if they are the maximum of a suppress_ms window centred on
+    them.
+
+    Returns (onset_times, onset_energies) arrays.
+    """
+    if len(energies) < 2:
+        return np.empty(0), np.empty(0)
+
+    threshold = delta_static + median_filter(energies, size=2 * median_half_width + 1)
+    candidates = np.flatnonzero(energies > threshold)
+
+    # Window argmax lands on the centre frame only for a local maximum;
+    # w is the half-width, so the 2w+1 frames span suppress_ms
+    hop_s = times[1] - times[0]
+    w = max(1, int(round(suppress_ms / 2 / 1000.0 / hop_s)))
+    padded = np.pad(energies, w, constant_values=-np.inf)
+    windows = sliding_window_view(padded, 2 * w + 1)[candidates]
+    onsets = candidates[windows.argmax(axis=1) == w]
+
+    return times[onsets], energies[onsets]
 
 def main():
     wav_path = "/tmp/test_eight_steps.wav"
@@ -75,27 +144,43 @@ def main():
     print()
 
     # Calculate envelope
-    envelope = calculate_energy_envelope(samples, sample_rate, window_ms=5.0)
+    times, rms = calculate_energy_envelope(samples, sample_rate, window_ms=5.0)
 
-    max_energy = max(e[1] for e in envelope)
+    max_energy = rms.max()
     print(f"Max energy: {max_energy:.6f}")
     print()
 
-    # Try different thresholds
-    for thresh_factor in [0.05, 0.10, 0.15, 0.20, 0.25, 0.30]:
-        onsets = detect_onsets(envelope, threshold_factor=thresh_factor, min_distance_ms=60)
-        print(f"Threshold {thresh_factor*100:.0f}% of max ({max_energy * thresh_factor:.6f}):")
-        print(f"  Detected {len(onsets)} onsets")
-        if onsets and len(onsets) <= 12:
-            for i, (time, energy) in enumerate(onsets):
-                print(f"    Onset {i+1}: {time:.3f}s (energy: {energy:.6f})")
-        print()
+    # Valley-peak-distance onset detection on the lowpassed signal
+    mu = 0.85
+    cutoff_hz = 150.0
+    low_times, low_rms = calculate_energy_envelope(
+        lowpass(samples, sample_rate, cutoff_hz), sample_rate, window_ms=5.0)
+    onset_times, rises = detect_onsets(low_times, low_rms, mu=mu)
+    print(f"Valley-peak detection ({cutoff_hz:.0f} Hz lowpass, mu={mu:.2f}):")
+    print(f"  Detected {len(onset_times)} onsets")
+    if 0 < len(onset_times) <= 12:
+        for i, (time, rise) in enumerate(zip(onset_times, rises)):
+            print(f"    Onset {i+1}: {time:.3f}s (rise: {rise:.6f})")
+    print()
+
+    # Median-filter adaptive threshold detection
+    onset_times, onset_energies = detect_onsets_adaptive(times, rms)
+    print("Adaptive median threshold detection:")
+    print(f"  Detected {len(onset_times)} onsets")
+    if 0 < len(onset_times) <= 12:
+        for i, (time, energy) in enumerate(zip(onset_times, onset_energies)):
+            print(f"    Onset {i+1}: {time:.3f}s (energy: {energy:.6f})")
+    print()
 
     # Show energy envelope peaks
     print("Energy envelope (top 20 peaks):")
-    sorted_env = sorted(envelope, key=lambda x: x[1], reverse=True)[:20]
-    for i, (time, energy) in enumerate(sorted_env):
-        print(f"  {i+1:2d}. {time:.3f}s: {energy:.6f}")
+    top = min(20, len(rms))
+    if top:
+        # Select the top frames in O(N), then sort only those
+        idx = np.argpartition(rms, -top)[-top:]
+        idx = idx[np.argsort(rms[idx])[::-1]]
+        for i, j in enumerate(idx):
+            print(f"  {i+1:2d}. {times[j]:.3f}s: {rms[j]:.6f}")
 
 if __name__ == "__main__":
     main()
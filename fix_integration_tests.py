@@ -10,33 +10,55 @@ Fixes common issues in integration test files:
 This script is safe to run multiple times (idempotent).
 """
 
-import re
 import glob
+import mmap
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Tuple
 
-def fix_duplicate_fields(content: str) -> Tuple[str, int]:
-    """Remove duplicate field specifications."""
-    fixes = 0
+# Pattern: field: value, followed by same field again (with optional whitespace/newlines).
+# One alternation so the text is scanned once; the matching group is the field to keep.
+_DUPLICATE_FIELD = re.compile('|'.join([
+    r'(\bpending_freq:\s*None,)\s*\n?\s*pending_freq:\s*None,',
+    r'(\blast_sample:\s*0\.0,)\s*\n?\s*last_sample:\s*0\.0,',
+    r'(\benvelope_type:\s*None,)\s*\n?\s*envelope_type:\s*None,',
+]), re.MULTILINE)
+_DUPLICATE_FIELD_MARKERS = (b'pending_freq:', b'last_sample:', b'envelope_type:')
 
-    # Pattern: field: value, followed by same field again (with optional whitespace/newlines)
-    patterns = [
-        (r'(\bpending_freq:\s*None,)\s*\n?\s*pending_freq:\s*None,', r'\1'),
-        (r'(\blast_sample:\s*0\.0,)\s*\n?\s*last_sample:\s*0\.0,', r'\1'),
-        (r'(\benvelope_type:\s*None,)\s*\n?\s*envelope_type:\s*None,', r'\1'),
-    ]
+# Match SignalNode blocks (non-greedy, stops at the first closing brace)
+_SAMPLE_BLOCK = re.compile(r'SignalNode::Sample\s*\{[^}]*\}', re.DOTALL)
+_OSCILLATOR_BLOCK = re.compile(r'SignalNode::Oscillator\s*\{[^}]*\}', re.DOTALL)
 
-    for pattern, replacement in patterns:
-        new_content, count = re.subn(pattern, replacement, content, flags=re.MULTILINE)
-        fixes += count
-        content = new_content
+def insert_after_line(block: str, marker: str, fields: List[str]) -> Tuple[str, int]:
+    """Insert fields after the line containing marker, matching its indentation.
 
-    return content, fixes
+    Nothing is inserted if marker is absent or sits on the block's last line.
+    """
+    pos = block.find(marker)
+    if pos == -1:
+        return block, 0
+
+    line_end = block.find('\n', pos)
+    if line_end == -1:
+        return block, 0
+
+    line_start = block.rfind('\n', 0, pos) + 1
+    line = block[line_start:line_end]
+    indent = ' ' * (len(line) - len(line.lstrip()))
+    insertion = ''.join(f'\n{indent}{field}' for field in fields)
+
+    return block[:line_end] + insertion + block[line_end:], len(fields)
+
+def fix_duplicate_fields(content: str) -> Tuple[str, int]:
+    """Remove duplicate field specifications."""
+    return _DUPLICATE_FIELD.subn(lambda m: m.group(m.lastindex), content)
 
 def fix_missing_envelope_type(content: str) -> Tuple[str, int]:
     """Add missing envelope_type field to SignalNode::Sample."""
     fixes = 0
 
-    # Find all SignalNode::Sample { ... } blocks
     def add_envelope_if_missing(match):
         nonlocal fixes
         block = match.group(0)
@@ -45,25 +67,12 @@ def fix_missing_envelope_type(content: str) -> Tuple[str, int]:
         if 'envelope_type:' in block:
             return block
 
-        # Find the release field and add envelope_type after it
-        lines = block.split('\n')
-        result = []
-
-        for i, line in enumerate(lines):
-            result.append(line)
+        # Add envelope_type after the release field
+        block, added = insert_after_line(block, 'release: Signal::Value', ['envelope_type: None,'])
+        fixes += added
+        return block
 
-            # After release field, add envelope_type
-            if 'release: Signal::Value' in line and i < len(lines) - 1:
-                # Get indentation from current line
-                indent = len(line) - len(line.lstrip())
-                result.append(' ' * indent + 'envelope_type: None,')
-                fixes += 1
-
-        return '\n'.join(result)
-
-    # Match SignalNode::Sample blocks (non-greedy, handles nesting)
-    pattern = r'SignalNode::Sample\s*\{[^}]*\}'
-    content = re.sub(pattern, add_envelope_if_missing, content, flags=re.DOTALL)
+    content = _SAMPLE_BLOCK.sub(add_envelope_if_missing, content)
 
     return content, fixes
 
@@ -75,54 +84,83 @@ def fix_missing_oscillator_fields(content: str) -> Tuple[str, int]:
         nonlocal fixes
         block = match.group(0)
 
-        has_pending_freq = 'pending_freq:' in block
-        has_last_sample = 'last_sample:' in block
+        missing = []
+        if 'pending_freq:' not in block:
+            missing.append('pending_freq: None,')
+        if 'last_sample:' not in block:
+            missing.append('last_sample: 0.0,')
 
-        if has_pending_freq and has_last_sample:
+        if not missing:
             return block
 
-        lines = block.split('\n')
-        result = []
+        # Add missing fields after the phase field
+        block, added = insert_after_line(block, 'phase:', missing)
+        fixes += added
+        return block
 
-        for i, line in enumerate(lines):
-            result.append(line)
+    content = _OSCILLATOR_BLOCK.sub(add_oscillator_fields_if_missing, content)
 
-            # After phase field, add missing fields
-            if 'phase:' in line and i < len(lines) - 1:
-                indent = len(line) - len(line.lstrip())
+    return content, fixes
 
-                if not has_pending_freq:
-                    result.append(' ' * indent + 'pending_freq: None,')
-                    fixes += 1
+def prefilter_with_ripgrep(files: List[str], markers: List[str]) -> List[str]:
+    """Return the files containing any marker, using one ripgrep pass when available.
 
-                if not has_last_sample:
-                    result.append(' ' * indent + 'last_sample: 0.0,')
-                    fixes += 1
+    Falls back to all files (each is still prefiltered in Python) if rg is
+    not installed, cannot be started (e.g. the argument list is too long),
+    prints a path that is not UTF-8, or fails.
+    """
+    if not files:
+        return []
 
-        return '\n'.join(result)
+    args = ['rg', '--files-with-matches', '--fixed-strings']
+    for marker in markers:
+        args += ['-e', marker]
+    try:
+        result = subprocess.run(args + ['--', *files], capture_output=True, text=True)
+    except (OSError, UnicodeDecodeError):
+        return files
 
-    pattern = r'SignalNode::Oscillator\s*\{[^}]*\}'
-    content = re.sub(pattern, add_oscillator_fields_if_missing, content, flags=re.DOTALL)
+    # Exit status 0: matches, 1: no matches, 2: error
+    if result.returncode > 1:
+        return files
 
-    return content, fixes
+    matched = set(result.stdout.splitlines())
+    return [f for f in files if f in matched]
 
 def fix_file(filepath: str) -> Tuple[bool, dict]:
     """Fix a single test file. Returns (changed, stats)."""
     try:
-        with open(filepath, 'r') as f:
-            original = f.read()
+        stats = {'duplicates': 0, 'missing_envelope': 0, 'missing_oscillator': 0}
+
+        # Cheap substring prefilter on the mapped bytes: skip any fix whose
+        # marker never appears, and only decode the file if some fix applies
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False, stats
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                has_fields = any(mm.find(field) != -1 for field in _DUPLICATE_FIELD_MARKERS)
+                has_sample = mm.find(b'SignalNode::Sample') != -1
+                has_oscillator = mm.find(b'SignalNode::Oscillator') != -1
+
+                if not (has_fields or has_sample or has_oscillator):
+                    return False, stats
+
+                original = mm[:].decode('utf-8')
 
         content = original
-        stats = {'duplicates': 0, 'missing_envelope': 0, 'missing_oscillator': 0}
 
         # Apply fixes in order
-        content, stats['duplicates'] = fix_duplicate_fields(content)
-        content, stats['missing_envelope'] = fix_missing_envelope_type(content)
-        content, stats['missing_oscillator'] = fix_missing_oscillator_fields(content)
+        if has_fields:
+            content, stats['duplicates'] = fix_duplicate_fields(content)
+        if has_sample:
+            content, stats['missing_envelope'] = fix_missing_envelope_type(content)
+        if has_oscillator:
+            content, stats['missing_oscillator'] = fix_missing_oscillator_fields(content)
 
         # Only write if changed
         if content != original:
-            with open(filepath, 'w') as f:
+            with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
             return True, stats
 
@@ -144,9 +182,16 @@ def main():
     total_fixed = 0
     total_stats = {'duplicates': 0, 'missing_envelope': 0, 'missing_oscillator': 0}
 
-    for filepath in test_files:
-        changed, stats = fix_file(filepath)
+    # Only files mentioning a field or node we fix can need changes
+    markers = [field.decode() for field in _DUPLICATE_FIELD_MARKERS]
+    markers += ['SignalNode::Sample', 'SignalNode::Oscillator']
+    candidates = prefilter_with_ripgrep(test_files, markers)
+
+    # Files are independent, so fix them in parallel; map() keeps input order
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(fix_file, candidates, chunksize=8))
 
+    for filepath, (changed, stats) in zip(candidates, results):
         if changed:
             total_fixed += 1
             for key in total_stats:
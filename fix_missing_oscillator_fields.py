@@ -7,97 +7,97 @@ Ensures all SignalNode::Oscillator nodes have:
 - last_sample: 0.0,
 """
 
+import mmap
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+OSCILLATOR_OPEN = 'SignalNode::Oscillator {'
+
 def fix_oscillator_fields(content: str) -> tuple[str, int]:
     """Add missing oscillator fields."""
-    lines = content.split('\n')
-    result = []
+    out = []
     fixes = 0
-
     i = 0
-    while i < len(lines):
-        line = lines[i]
-        result.append(line)
-
-        # Check if this line starts an Oscillator node
-        if 'SignalNode::Oscillator {' in line:
-            # Look ahead to find the closing brace
-            struct_lines = [line]
-            i += 1
-            brace_count = line.count('{') - line.count('}')
-
-            while i < len(lines) and brace_count > 0:
-                struct_lines.append(lines[i])
-                brace_count += lines[i].count('{') - lines[i].count('}')
-                i += 1
-
-            # Check if pending_freq and last_sample are present
-            struct_text = '\n'.join(struct_lines)
-            has_pending_freq = 'pending_freq:' in struct_text
-            has_last_sample = 'last_sample:' in struct_text
-
-            if not has_pending_freq or not has_last_sample:
-                # Find the closing brace line
-                closing_line_idx = len(struct_lines) - 1
-                while closing_line_idx >= 0:
-                    if '});' in struct_lines[closing_line_idx] or '})' in struct_lines[closing_line_idx]:
-                        break
-                    closing_line_idx -= 1
-
-                # Get indentation from previous line
-                prev_line = struct_lines[closing_line_idx - 1] if closing_line_idx > 0 else struct_lines[0]
-                indent = len(prev_line) - len(prev_line.lstrip())
-                indent_str = ' ' * indent
-
-                # Insert missing fields before closing brace
-                insert_lines = []
-                if not has_pending_freq:
-                    insert_lines.append(f'{indent_str}pending_freq: None,')
-                    fixes += 1
-                if not has_last_sample:
-                    insert_lines.append(f'{indent_str}last_sample: 0.0,')
-                    fixes += 1
-
-                # Add to result (skip the first line as it's already added)
-                for j in range(1, closing_line_idx):
-                    result.append(struct_lines[j])
-
-                # Add the missing fields
-                for insert_line in insert_lines:
-                    result.append(insert_line)
-
-                # Add the closing brace
-                result.append(struct_lines[closing_line_idx])
-            else:
-                # Add all lines as-is (skip first as already added)
-                for j in range(1, len(struct_lines)):
-                    result.append(struct_lines[j])
-
-            continue
-
-        i += 1
-
-    return '\n'.join(result), fixes
-
-def process_file(filepath: Path) -> bool:
-    """Process a single file."""
+
+    while True:
+        # Find the next Oscillator node
+        j = content.find(OSCILLATOR_OPEN, i)
+        if j == -1:
+            out.append(content[i:])
+            break
+
+        # Match braces forward from the opening one to find the closing brace
+        k = j + len(OSCILLATOR_OPEN) - 1
+        depth = 0
+        while k < len(content):
+            if content[k] == '{':
+                depth += 1
+            elif content[k] == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            k += 1
+        else:
+            # Unbalanced: leave the rest of the file untouched
+            out.append(content[i:])
+            break
+
+        out.append(content[i:j])
+
+        # Check if pending_freq and last_sample are present
+        struct_text = content[j:k + 1]
+        insert_fields = []
+        if 'pending_freq:' not in struct_text:
+            insert_fields.append('pending_freq: None,')
+        if 'last_sample:' not in struct_text:
+            insert_fields.append('last_sample: 0.0,')
+
+        # Insert missing fields on their own lines just before the closing
+        # brace's line, indented like the line above it. Single-line nodes
+        # have no such line and are left as-is.
+        closing_line_start = content.rfind('\n', j, k) + 1
+        if insert_fields and closing_line_start > 0:
+            prev_line_start = content.rfind('\n', 0, closing_line_start - 1) + 1
+            prev_line = content[prev_line_start:closing_line_start - 1]
+            indent_str = ' ' * (len(prev_line) - len(prev_line.lstrip()))
+
+            out.append(content[j:closing_line_start])
+            for field in insert_fields:
+                out.append(f'{indent_str}{field}\n')
+                fixes += 1
+            out.append(content[closing_line_start:k + 1])
+        else:
+            out.append(struct_text)
+
+        i = k + 1
+
+    return ''.join(out), fixes
+
+def process_file(filepath: Path) -> tuple[bool, str]:
+    """Process a single file. Returns (changed, status message)."""
     try:
-        content = filepath.read_text()
+        # Search the mapped bytes first; files without an Oscillator are never decoded
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False, f"✓  {filepath}: No fixes needed"
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm.find(b'SignalNode::Oscillator {') == -1:
+                    return False, f"✓  {filepath}: No fixes needed"
+                content = mm[:].decode('utf-8')
+
         fixed_content, num_fixes = fix_oscillator_fields(content)
 
         if num_fixes > 0:
-            filepath.write_text(fixed_content)
-            print(f"✅ {filepath}: Added {num_fixes} missing oscillator fields")
-            return True
+            filepath.write_text(fixed_content, encoding='utf-8')
+            return True, f"✅ {filepath}: Added {num_fixes} missing oscillator fields"
         else:
-            print(f"✓  {filepath}: No fixes needed")
-            return False
+            return False, f"✓  {filepath}: No fixes needed"
     except Exception as e:
-        print(f"❌ {filepath}: Error - {e}")
-        return False
+        return False, f"❌ {filepath}: Error - {e}"
 
 def main():
     example_files = [
@@ -106,11 +106,14 @@ def main():
         Path('examples/phonon_live.rs'),
         Path('examples/live_playground.rs'),
     ]
+    example_files = [filepath for filepath in example_files if filepath.exists()]
 
+    # Files are independent, so fix them in parallel; map() keeps input order
     total_fixed = 0
-    for filepath in example_files:
-        if filepath.exists():
-            if process_file(filepath):
+    with ProcessPoolExecutor() as executor:
+        for changed, message in executor.map(process_file, example_files, chunksize=8):
+            print(message)
+            if changed:
                 total_fixed += 1
 
     print(f"\n✅ Fixed {total_fixed} files")
@@ -3,53 +3,46 @@
 Fix Oscillator, FMOscillator, and PMOscillator field initialization to use RefCell.
 """
 
+import mmap
+import os
 import sys
 import re
 from pathlib import Path
 
+from fix_integration_tests import prefilter_with_ripgrep
+
+# Substrings at least one of which must occur for any fix below to apply
+_FIX_MARKERS = (
+    b'phase:', b'pending_freq:', b'last_sample:',
+    b'SignalNode::Oscillator', b'SignalNode::FMOscillator', b'SignalNode::PMOscillator',
+)
+
+# Bare field initializers that need wrapping in RefCell::new(). One alternation
+# so each file is scanned once; the named group that matched is the field name
+# and holds its value.
+_FIELD_INIT = re.compile(
+    r'(?P<indent>\s+)(?:'
+    r'phase:\s*(?P<phase>\d+\.\d+|[^,\n]+)'
+    r'|pending_freq:\s*(?P<pending_freq>None)'
+    r'|last_sample:\s*(?P<last_sample>\d+\.\d+)'
+    r'|carrier_phase:\s*(?P<carrier_phase>\d+\.\d+)'
+    r'|modulator_phase:\s*(?P<modulator_phase>\d+\.\d+)'
+    r'),\s*$',
+    re.MULTILINE
+)
+_REFCELL_IMPORT = re.compile(r'use std::cell::RefCell')
+_FIRST_USE = re.compile(r'^use\s+', re.MULTILINE)
+
+def _wrap_in_refcell(match):
+    field = match.lastgroup
+    return f"{match.group('indent')}{field}: RefCell::new({match.group(field)}),"
+
 def fix_oscillator_fields(content):
     """Replace bare field initializers with RefCell::new() wrapped versions."""
 
-    # Fix regular Oscillator phase fields
-    content = re.sub(
-        r'(\s+)phase:\s*(\d+\.\d+|[^,\n]+),\s*$',
-        r'\1phase: RefCell::new(\2),',
-        content,
-        flags=re.MULTILINE
-    )
-
-    # Fix pending_freq fields
-    content = re.sub(
-        r'(\s+)pending_freq:\s*None,\s*$',
-        r'\1pending_freq: RefCell::new(None),',
-        content,
-        flags=re.MULTILINE
-    )
-
-    # Fix last_sample fields
-    content = re.sub(
-        r'(\s+)last_sample:\s*(\d+\.\d+),\s*$',
-        r'\1last_sample: RefCell::new(\2),',
-        content,
-        flags=re.MULTILINE
-    )
-
-    # Fix FMOscillator carrier_phase and modulator_phase
-    content = re.sub(
-        r'(\s+)carrier_phase:\s*(\d+\.\d+),\s*$',
-        r'\1carrier_phase: RefCell::new(\2),',
-        content,
-        flags=re.MULTILINE
-    )
-
-    content = re.sub(
-        r'(\s+)modulator_phase:\s*(\d+\.\d+),\s*$',
-        r'\1modulator_phase: RefCell::new(\2),',
-        content,
-        flags=re.MULTILINE
-    )
-
-    return content
+    # Oscillator phase/pending_freq/last_sample and
+    # FMOscillator carrier_phase/modulator_phase
+    return _FIELD_INIT.sub(_wrap_in_refcell, content)
 
 def add_refcell_import(content):
     """Add RefCell import if not present and needed."""
@@ -60,11 +53,11 @@ def add_refcell_import(content):
                      'SignalNode::PMOscillator' in content
 
     # Check if RefCell is already imported
-    has_refcell_import = re.search(r'use std::cell::RefCell', content)
+    has_refcell_import = _REFCELL_IMPORT.search(content)
 
     if has_oscillator and not has_refcell_import:
         # Find the first 'use' statement location
-        use_match = re.search(r'^use\s+', content, re.MULTILINE)
+        use_match = _FIRST_USE.search(content)
         if use_match:
             # Insert before first use
             pos = use_match.start()
@@ -85,8 +78,15 @@ def add_refcell_import(content):
 def process_file(filepath):
     """Process a single file."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Search the mapped bytes first; files no fix applies to are never decoded
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if not any(mm.find(marker) != -1 for marker in _FIX_MARKERS):
+                    return False
+                content = mm[:].decode('utf-8')
 
         original = content
 
@@ -119,8 +119,11 @@ def main():
         for pattern in ['src/**/*.rs', 'tests/**/*.rs', 'examples/**/*.rs']:
             files.extend(base.glob(pattern))
 
+    markers = [marker.decode() for marker in _FIX_MARKERS]
+    candidates = prefilter_with_ripgrep([str(f) for f in files], markers)
+
     updated = 0
-    for filepath in files:
+    for filepath in map(Path, candidates):
         if process_file(filepath):
             print(f"Updated: {filepath}")
             updated += 1
@@ -1,15 +1,20 @@
 #!/usr/bin/env python3
+import mmap
+import os
 import re
 import sys
 
+# Pattern for matching Oscillator destructuring
+OSCILLATOR_PATTERN = re.compile(
+    r'(SignalNode::Oscillator\s*\{\s*)'
+    r'((?:freq|waveform|phase|pending_freq|last_sample)\s*[:,].*?)*'
+    r'(\})',
+    re.MULTILINE | re.DOTALL
+)
+
 def fix_oscillator_patterns(content):
     """Fix SignalNode::Oscillator pattern matches to include semitone_offset"""
 
-    # Pattern for matching Oscillator destructuring
-    pattern = r'(SignalNode::Oscillator\s*\{\s*)'
-    pattern += r'((?:freq|waveform|phase|pending_freq|last_sample)\s*[:,].*?)*'
-    pattern += r'(\})'
-
     # Find all Oscillator patterns and add semitone_offset if missing
     def replace_pattern(match):
         start = match.group(1)
@@ -26,16 +31,23 @@ def fix_oscillator_patterns(content):
         else:
             return f"{start}semitone_offset: _,{end}"
 
-    return re.sub(pattern, replace_pattern, content, flags=re.MULTILINE | re.DOTALL)
+    return OSCILLATOR_PATTERN.sub(replace_pattern, content)
 
 if __name__ == "__main__":
     for filename in sys.argv[1:]:
-        with open(filename, 'r') as f:
-            content = f.read()
+        # Search the mapped bytes first; files without an Oscillator are never decoded
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                continue
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm.find(b'SignalNode::Oscillator') == -1:
+                    continue
+                content = mm[:].decode('utf-8')
 
         new_content = fix_oscillator_patterns(content)
 
         if new_content != content:
-            with open(filename, 'w') as f:
+            with open(filename, 'w', encoding='utf-8') as f:
                 f.write(new_content)
             print(f"Fixed {filename}")
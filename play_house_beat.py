@@ -8,6 +8,7 @@ import numpy as np
 import struct
 import subprocess
 import time
+from functools import lru_cache
 from pathlib import Path
 
 # Audio parameters
@@ -15,60 +16,93 @@ SAMPLE_RATE = 44100
 TEMPO = 120  # BPM
 BEAT_DURATION = 60.0 / TEMPO  # Duration of one beat in seconds
 PATTERN_LENGTH = 16  # 16 steps (one bar)
+MIX_LEVEL = 0.5  # Per-hit gain, baked into the generated samples
 
+_RNG = np.random.default_rng()
+
+# The drum generators are memoized: every hit of a sound, and every
+# create_house_beat call in this process, shares one rendered array
+
+@lru_cache(maxsize=None)
 def generate_kick():
-    """Generate a kick drum sound"""
+    """Generate a kick drum sound (cached; the returned array is read-only)"""
     duration = 0.2
-    t = np.linspace(0, duration, int(SAMPLE_RATE * duration))
-    # Low frequency sine with pitch envelope
-    freq_env = 60 * (1 + np.exp(-t * 50))
-    amplitude_env = np.exp(-t * 20)
-    kick = np.sin(2 * np.pi * freq_env * t) * amplitude_env
+    t = np.arange(int(SAMPLE_RATE * duration), dtype=np.float32) / SAMPLE_RATE
+    # Low frequency sine with pitch envelope: sin(2*pi * 60*(1 + e^(-50t)) * t)
+    kick = np.exp(t * -50)
+    kick += 1
+    np.multiply(kick, t * (2 * np.pi * 60), out=kick)
+    np.sin(kick, out=kick)
+    amplitude_env = np.exp(t * -20)
+    amplitude_env *= MIX_LEVEL
+    np.multiply(kick, amplitude_env, out=kick)
+    kick.flags.writeable = False
     return kick
 
+@lru_cache(maxsize=None)
 def generate_snare():
-    """Generate a snare drum sound"""
+    """Generate a snare drum sound (cached; the returned array is read-only)"""
     duration = 0.15
-    t = np.linspace(0, duration, int(SAMPLE_RATE * duration))
+    t = np.arange(int(SAMPLE_RATE * duration), dtype=np.float32) / SAMPLE_RATE
     # Mix of noise and tone
-    noise = np.random.normal(0, 0.1, len(t))
-    tone = np.sin(2 * np.pi * 200 * t) * 0.3
-    amplitude_env = np.exp(-t * 30)
-    snare = (noise + tone) * amplitude_env
+    snare = np.empty(len(t), dtype=np.float32)
+    _RNG.standard_normal(out=snare, dtype=np.float32)
+    snare *= 0.1
+    tone = np.sin(t * (2 * np.pi * 200))
+    tone *= 0.3
+    np.add(snare, tone, out=snare)
+    amplitude_env = np.exp(t * -30)
+    amplitude_env *= MIX_LEVEL
+    np.multiply(snare, amplitude_env, out=snare)
+    snare.flags.writeable = False
     return snare
 
+@lru_cache(maxsize=None)
 def generate_hihat():
-    """Generate a hi-hat sound"""
+    """Generate a hi-hat sound (cached; the returned array is read-only)"""
     duration = 0.05
-    t = np.linspace(0, duration, int(SAMPLE_RATE * duration))
+    t = np.arange(int(SAMPLE_RATE * duration), dtype=np.float32) / SAMPLE_RATE
     # High frequency noise
-    noise = np.random.normal(0, 0.2, len(t))
-    amplitude_env = np.exp(-t * 100)
-    hihat = noise * amplitude_env
+    hihat = np.empty(len(t), dtype=np.float32)
+    _RNG.standard_normal(out=hihat, dtype=np.float32)
+    hihat *= 0.2
+    amplitude_env = np.exp(t * -100)
+    amplitude_env *= MIX_LEVEL
+    np.multiply(hihat, amplitude_env, out=hihat)
+    hihat.flags.writeable = False
     return hihat
 
 def write_wav(filename, audio_data, sample_rate=44100):
     """Write audio data to WAV file"""
-    # Normalize and convert to 16-bit
-    audio_data = np.clip(audio_data, -1, 1)
-    audio_16bit = (audio_data * 32767).astype(np.int16)
+    # Normalize and convert to 16-bit (clip makes the only copy; scale and
+    # round to nearest in place, since a bare cast truncates toward zero)
+    audio = np.clip(audio_data, -1, 1)
+    audio *= 32767
+    np.rint(audio, out=audio)
+    data = audio.astype(np.int16).tobytes()
+    
+    # 44-byte RIFF/WAVE header: 16-bit mono PCM
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + len(data), b'WAVE',
+        b'fmt ', 16, 1, 1,                   # fmt chunk size, PCM, mono
+        sample_rate, sample_rate * 2, 2, 16,  # byte rate, block align, bits per sample
+        b'data', len(data)
+    )
     
     with open(filename, 'wb') as f:
-        # WAV header
-        f.write(b'RIFF')
-        f.write(struct.pack('<I', 36 + len(audio_16bit) * 2))
-        f.write(b'WAVE')
-        f.write(b'fmt ')
-        f.write(struct.pack('<I', 16))  # fmt chunk size
-        f.write(struct.pack('<H', 1))   # PCM
-        f.write(struct.pack('<H', 1))   # Mono
-        f.write(struct.pack('<I', sample_rate))
-        f.write(struct.pack('<I', sample_rate * 2))
-        f.write(struct.pack('<H', 2))   # Block align
-        f.write(struct.pack('<H', 16))  # Bits per sample
-        f.write(b'data')
-        f.write(struct.pack('<I', len(audio_16bit) * 2))
-        f.write(audio_16bit.tobytes())
+        f.write(header)
+        f.write(data)
+
+def overlap_add(output, sample_data, starts):
+    """Mix sample_data into output at each start offset (samples are pre-scaled)"""
+    # One in-place slice add per hit, truncated at the end of the buffer;
+    # overlapping tails simply accumulate
+    for start in starts:
+        end = min(start + len(sample_data), len(output))
+        if end > start:
+            target = output[start:end]
+            np.add(target, sample_data[:end - start], out=target)
 
 def create_house_beat(duration_seconds=10):
     """Create a house beat pattern"""
@@ -94,27 +128,26 @@ def create_house_beat(duration_seconds=10):
     # Calculate total samples needed
     total_samples = int(SAMPLE_RATE * duration_seconds)
     
-    # Create output buffer
-    output = np.zeros(total_samples)
+    # Render one bar, with room for hits that ring past the bar line:
+    # one start-offset array per sound, then one overlap-add per sound
+    bar_samples = samples_per_step * len(pattern)
+    longest = max(len(sample_data) for sample_data in samples.values())
+    bar = np.zeros(bar_samples + longest, dtype=np.float32)
+    step_positions = np.arange(len(pattern)) * samples_per_step
+    
+    for sound, sample_data in samples.items():
+        slots = [i for i, name in enumerate(pattern) if name == sound]
+        overlap_add(bar, sample_data, step_positions[slots])
     
-    # Fill the buffer with the pattern
-    step_index = 0
-    sample_pos = 0
+    # Create output buffer by repeating the bar, then the partial bar at the end
+    output = np.empty(total_samples, dtype=np.float32)
+    n_bars, tail = divmod(total_samples, bar_samples)
+    output[:n_bars * bar_samples].reshape(n_bars, bar_samples)[:] = bar[:bar_samples]
+    output[n_bars * bar_samples:] = bar[:tail]
     
-    while sample_pos < total_samples:
-        # Get current step in pattern
-        sound = pattern[step_index % len(pattern)]
-        
-        if sound and sound in samples:
-            # Add the sample to output
-            sample_data = samples[sound]
-            end_pos = min(sample_pos + len(sample_data), total_samples)
-            copy_length = end_pos - sample_pos
-            output[sample_pos:end_pos] += sample_data[:copy_length] * 0.5
-        
-        # Move to next step
-        sample_pos += samples_per_step
-        step_index += 1
+    # Each bar's ring-out spills into the start of the next one
+    bar_starts = np.arange(bar_samples, total_samples, bar_samples)
+    overlap_add(output, bar[bar_samples:], bar_starts)
     
     return output
 
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from debug_onset_detection import calculate_energy_envelope, detect_onsets, lowpass
+from play_house_beat import SAMPLE_RATE, generate_kick
+
+def frame_times(energies, hop_s=0.005):
+    return np.arange(len(energies)) * hop_s
+
+def test_hit_at_start_is_detected():
+    energies = np.array([0.5, 1.0, 0.4, 0.1, 0.1, 0.9, 0.3, 0.1])
+    onset_times, rises = detect_onsets(frame_times(energies), energies, mu=0.75)
+    np.testing.assert_allclose(onset_times, [0.0, 0.020])
+    np.testing.assert_allclose(rises, [1.0, 0.8])
+
+def test_leading_silence_onset_is_at_end_of_silence():
+    energies = np.array([0.0, 0.0, 0.0, 0.0, 0.8, 0.4, 0.1])
+    onset_times, rises = detect_onsets(frame_times(energies), energies)
+    np.testing.assert_allclose(onset_times, [0.015])
+    np.testing.assert_allclose(rises, [0.8])
+
+def test_mu_one_keeps_largest_rise():
+    energies = np.array([0.1, 0.05, 0.5, 0.1, 0.6, 0.05])
+    onset_times, rises = detect_onsets(frame_times(energies), energies, mu=1.0)
+    np.testing.assert_allclose(onset_times, [0.015])
+    np.testing.assert_allclose(rises, [0.5])
+
+@pytest.mark.parametrize('silence_s', [0.0, 0.05])
+def test_rendered_kick_onset(silence_s):
+    samples = np.concatenate((np.zeros(int(SAMPLE_RATE * silence_s), dtype=np.float32),
+                              generate_kick()))
+    times, rms = calculate_energy_envelope(lowpass(samples, SAMPLE_RATE), SAMPLE_RATE)
+    onset_times, _ = detect_onsets(times, rms)
+    assert len(onset_times) == 1
+    assert onset_times[0] == pytest.approx(silence_s, abs=0.01)